@@ -20,8 +20,8 @@ export const corsOptions = {
   },
   credentials: true,
   methods: ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'],
-  allowedHeaders: ['Content-Type', 'Authorization', 'X-Requested-With'],
-  exposedHeaders: ['X-Total-Count', 'X-Page-Count'],
+  allowedHeaders: ['Content-Type', 'Authorization', 'X-Requested-With', 'Range', 'If-Range', 'If-None-Match'],
+  exposedHeaders: ['X-Total-Count', 'X-Page-Count', 'Accept-Ranges', 'Content-Range', 'ETag'],
   maxAge: 86400, // 24 hours
   optionsSuccessStatus: 200
 };
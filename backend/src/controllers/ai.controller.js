@@ -5,9 +5,16 @@
 
 import axios from 'axios';
 import logger from '../utils/logger.js';
+import { rememberTtsEtag } from '../utils/ttsEtags.js';
 
 const AI_SERVICE_URL = process.env.PYTHON_AI_SERVICE_URL || 'http://localhost:5000';
 
+/**
+ * Identify the end client to the AI service so it rate limits per user
+ * rather than per proxy
+ */
+const clientHeaders = (req) => ({ 'X-Forwarded-For': req.ip });
+
 /**
  * Process speech-to-text
  */
@@ -20,6 +27,7 @@ export const processSpeechToText = async (req, res) => {
       language,
     }, {
       timeout: 30000, // 30 second timeout for AI processing
+      headers: clientHeaders(req),
     });
 
     logger.info(`Speech-to-text processed for ${req.session.userEmail}`);
@@ -41,10 +49,12 @@ export const processSpeechToText = async (req, res) => {
 
 /**
  * Process text-to-speech
+ * GET takes the same fields as query parameters so audio elements can seek
  */
 export const processTextToSpeech = async (req, res) => {
   try {
-    const { text, language = 'en-US', voice = 'default' } = req.body;
+    const isGet = req.method === 'GET';
+    const { text, language = 'en-US', voice = 'default', format } = isGet ? req.query : req.body;
 
     if (!text) {
       return res.status(400).json({
@@ -53,22 +63,44 @@ export const processTextToSpeech = async (req, res) => {
       });
     }
 
-    const response = await axios.post(`${AI_SERVICE_URL}/api/text-to-speech`, {
-      text,
-      language,
-      voice,
-    }, {
+    // Forward format negotiation, range and cache validation headers
+    const forwardedHeaders = clientHeaders(req);
+    ['accept', 'range', 'if-range', 'if-none-match'].forEach((name) => {
+      if (req.headers[name]) {
+        forwardedHeaders[name] = req.headers[name];
+      }
+    });
+
+    const payload = { text, language, voice, format };
+    const options = {
       timeout: 30000,
       responseType: 'arraybuffer',
-    });
+      headers: forwardedHeaders,
+      validateStatus: (status) => [200, 206, 304, 412, 416].includes(status),
+    };
+
+    const url = `${AI_SERVICE_URL}/api/text-to-speech`;
+    const response = isGet
+      ? await axios.get(url, { ...options, params: payload })
+      : await axios.post(url, payload, options);
 
     logger.info(`Text-to-speech processed for ${req.session.userEmail}`);
 
-    // Return audio file
-    res.set({
-      'Content-Type': 'audio/mpeg',
-      'Content-Length': response.data.length,
+    // Return audio file with the AI service's status and caching headers
+    ['content-type', 'content-range', 'accept-ranges', 'etag', 'vary'].forEach((name) => {
+      if (response.headers[name]) {
+        res.set(name, response.headers[name]);
+      }
     });
+    if (response.status === 200 || response.status === 206) {
+      rememberTtsEtag({ text, language, format }, response.headers.etag);
+    }
+
+    res.status(response.status);
+    if (response.status === 304 || response.status === 412) {
+      return res.end();
+    }
+    res.set('Content-Length', response.data.length);
     res.send(response.data);
   } catch (error) {
     logger.error('Text-to-speech error:', error);
@@ -92,7 +124,7 @@ export const processVoiceCommand = async (req, res) => {
       const sttResponse = await axios.post(`${AI_SERVICE_URL}/api/speech-to-text`, {
         audio,
         language,
-      }, { timeout: 30000 });
+      }, { timeout: 30000, headers: clientHeaders(req) });
       commandText = sttResponse.data.text;
     }
 
@@ -107,7 +139,7 @@ export const processVoiceCommand = async (req, res) => {
     const response = await axios.post(`${AI_SERVICE_URL}/api/classify-intent`, {
       text: commandText,
       language,
-    }, { timeout: 10000 });
+    }, { timeout: 10000, headers: clientHeaders(req) });
 
     logger.info(`Voice command processed: "${commandText}" for ${req.session.userEmail}`);
 
@@ -145,7 +177,7 @@ export const detectSpam = async (req, res) => {
       subject,
       body,
       from,
-    }, { timeout: 10000 });
+    }, { timeout: 10000, headers: clientHeaders(req) });
 
     logger.info(`Spam detection performed for ${req.session.userEmail}`);
 
@@ -181,7 +213,7 @@ export const classifyIntent = async (req, res) => {
     const response = await axios.post(`${AI_SERVICE_URL}/api/classify-intent`, {
       text,
       language,
-    }, { timeout: 10000 });
+    }, { timeout: 10000, headers: clientHeaders(req) });
 
     logger.info(`Intent classified for ${req.session.userEmail}`);
 
@@ -5,6 +5,15 @@
 
 import rateLimit from 'express-rate-limit';
 import logger from '../utils/logger.js';
+import { hasKnownTtsEtag } from '../utils/ttsEtags.js';
+
+const isTtsGet = (req) => req.method === 'GET' && req.path === '/text-to-speech';
+
+// Revalidation or range read of audio the AI service already returned for this text
+const isKnownTtsRead = (req) => isTtsGet(req) && hasKnownTtsEtag(req.query, req.headers);
+
+// Range read (e.g. an <audio> element seeking) without a validator we recognise
+const isTtsRangeRead = (req) => isTtsGet(req) && Boolean(req.headers.range) && !isKnownTtsRead(req);
 
 // General API rate limiter
 export const rateLimiter = rateLimit({
@@ -52,6 +61,21 @@ export const aiRateLimiter = rateLimit({
     error: 'AI service rate limit exceeded',
     message: 'Too many AI requests. Please try again in a moment.',
   },
+  // Reads validated against an ETag we have seen are served from the AI
+  // service's cache; other range reads are counted by ttsRangeRateLimiter
+  skip: (req) => isKnownTtsRead(req) || isTtsRangeRead(req),
+});
+
+// Range reads of text-to-speech audio: seeking sends several per playback,
+// so they get a higher allowance but are still counted per client
+export const ttsRangeRateLimiter = rateLimit({
+  windowMs: 60 * 1000, // 1 minute
+  max: parseInt(process.env.TTS_RANGE_RATE_LIMIT_MAX) || 60,
+  message: {
+    error: 'AI service rate limit exceeded',
+    message: 'Too many audio requests. Please try again in a moment.',
+  },
+  skip: (req) => !isTtsRangeRead(req),
 });
 
 export default rateLimiter;
@@ -6,7 +6,7 @@
 import express from 'express';
 import { asyncHandler } from '../middleware/errorHandler.js';
 import { authenticate } from '../middleware/auth.js';
-import { aiRateLimiter } from '../middleware/rateLimiter.js';
+import { aiRateLimiter, ttsRangeRateLimiter } from '../middleware/rateLimiter.js';
 import { validateVoiceCommand } from '../middleware/validation.js';
 import {
   processSpeechToText,
@@ -25,7 +25,8 @@ router.use(aiRateLimiter);
 // Speech-to-text
 router.post('/speech-to-text', validateVoiceCommand, asyncHandler(processSpeechToText));
 
-// Text-to-speech
+// Text-to-speech (GET supports Range requests from audio elements)
+router.get('/text-to-speech', ttsRangeRateLimiter, asyncHandler(processTextToSpeech));
 router.post('/text-to-speech', asyncHandler(processTextToSpeech));
 
 // Voice command processing (includes intent classification)
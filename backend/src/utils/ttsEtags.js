@@ -0,0 +1,64 @@
+/**
+ * Text-to-speech ETag registry
+ * Remembers which ETags the AI service has returned for a piece of text, so
+ * revalidation and range reads of audio it already generated can be told
+ * apart from requests that would trigger new synthesis
+ */
+
+import crypto from 'crypto';
+
+const MAX_ENTRIES = parseInt(process.env.TTS_ETAG_CACHE_SIZE) || 1000;
+
+// Insertion-ordered, so the first key is the least recently used
+const etagsByText = new Map();
+
+/**
+ * Key a text-to-speech request by the fields that determine its audio
+ */
+const requestKey = ({ text = '', language = 'en-US', format = '' }) => crypto
+  .createHash('sha256')
+  .update(JSON.stringify([String(text), String(language), String(format)]))
+  .digest('hex');
+
+/**
+ * Strip weak prefix and quotes so W/"abc" and "abc" compare equal
+ */
+const opaqueTag = (etag) => etag.trim().replace(/^W\//, '').replace(/^"|"$/g, '');
+
+/**
+ * Record an ETag returned by the AI service for a request
+ */
+export const rememberTtsEtag = (fields, etag) => {
+  if (!etag) return;
+
+  const key = requestKey(fields);
+  const etags = etagsByText.get(key) || new Set();
+  etagsByText.delete(key);
+  etags.add(opaqueTag(etag));
+  etagsByText.set(key, etags);
+
+  if (etagsByText.size > MAX_ENTRIES) {
+    etagsByText.delete(etagsByText.keys().next().value);
+  }
+};
+
+/**
+ * Check whether a request's If-Range / If-None-Match validator is an ETag
+ * the AI service already returned for the same text
+ */
+export const hasKnownTtsEtag = (fields, headers) => {
+  const validators = [headers['if-range'], headers['if-none-match']]
+    .filter(Boolean)
+    .flatMap((value) => value.split(','))
+    .map(opaqueTag)
+    .filter(Boolean);
+  if (validators.length === 0) return false;
+
+  const etags = etagsByText.get(requestKey(fields));
+  return Boolean(etags) && validators.some((tag) => etags.has(tag));
+};
+
+export default {
+  rememberTtsEtag,
+  hasKnownTtsEtag,
+};
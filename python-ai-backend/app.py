@@ -4,8 +4,9 @@ Provides AI-powered speech processing, intent classification, and spam detection
 """
 import os
 import logging
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,11 +16,13 @@ load_dotenv()
 from services.speech_service import SpeechService
 from services.tts_service import TTSService
 from services.intent_classifier import IntentClassifier
+from services.entity_extractor import ContactIndex
 from services.spam_detector import SpamDetector
 
 # Import middleware
 from middleware.error_handler import handle_error, APIError
-from middleware.rate_limiter import rate_limiter
+from middleware.rate_limiter import rate_limiter, check_rate_limit
+from middleware.request_coalescer import request_coalescer
 
 # Configure logging
 logging.basicConfig(
@@ -30,7 +33,22 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app, origins=os.getenv('CORS_ORIGIN', '*'))
+
+# Behind the Node backend, take the client address from X-Forwarded-For so
+# rate limiting is per user rather than per proxy. Only enable this when the
+# service is reachable solely through that many trusted proxies, otherwise
+# clients can spoof the header.
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+CORS(
+    app,
+    origins=os.getenv('CORS_ORIGIN', '*'),
+    expose_headers=['Accept-Ranges', 'Content-Range', 'Content-Disposition', 'ETag']
+)
+
+TTS_DEFAULT_FORMAT = os.getenv('TTS_DEFAULT_FORMAT', 'mp3')
+VOICE_COMMAND_BATCH_MAX = int(os.getenv('VOICE_COMMAND_BATCH_MAX', 32))
 
 # Initialize services (lazy loading)
 speech_service = None
@@ -69,7 +87,8 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'voice-email-ai-backend',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'coalescing': request_coalescer.stats()
     })
 
 # Speech-to-Text endpoint
@@ -90,7 +109,11 @@ def speech_to_text():
         audio_data = data['audio']
         language = data.get('language', 'en')
         
-        result = get_speech_service().transcribe(audio_data, language)
+        # Retried uploads of the same clip share one transcription
+        key = request_coalescer.make_key('speech-to-text', [audio_data, language])
+        result = request_coalescer.run(
+            key, lambda: get_speech_service().transcribe(audio_data, language)
+        )
         
         return jsonify({
             'text': result['text'],
@@ -104,37 +127,119 @@ def speech_to_text():
         raise APIError(f'Speech recognition failed: {str(e)}', 500)
 
 # Text-to-Speech endpoint
-@app.route('/api/text-to-speech', methods=['POST'])
-@rate_limiter
+@app.route('/api/text-to-speech', methods=['GET', 'POST'])
 def text_to_speech():
     """
     Convert text to speech audio
-    Request: { "text": "Text to speak", "language": "en-US" }
-    Response: audio/mpeg file
+    Request: { "text": "Text to speak", "language": "en-US", "format": "opus" }
+             or GET with the same fields as query parameters
+    Response: audio/mpeg or audio/ogg file, negotiated via "format" or the Accept header;
+              supports Range, If-Range and If-None-Match
     """
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json(silent=True)
         
         if not data or 'text' not in data:
             raise APIError('Missing text data', 400)
         
         text = data['text']
         language = data.get('language', 'en')
+        audio_format = negotiate_audio_format(data.get('format'))
         
-        audio_file = get_tts_service().synthesize(text, language)
+        # Range reads and revalidation of cached audio (an <audio> element
+        # seeking) are served from the cache without counting against the limit
+        cached = None
+        if any(name in request.headers for name in ('Range', 'If-Range', 'If-None-Match')):
+            cached = get_tts_service().lookup(text, language, audio_format)
         
-        return send_file(
-            audio_file,
-            mimetype='audio/mpeg',
-            as_attachment=True,
-            download_name='speech.mp3'
-        )
+        if cached:
+            audio_bytes, etag = cached
+        else:
+            check_rate_limit()
+            # Concurrent requests for the same audio share one synthesis
+            key = request_coalescer.make_key('text-to-speech', [text, language, audio_format])
+            audio_bytes, etag = request_coalescer.run(
+                key, lambda: get_tts_service().get_audio(text, language, audio_format)
+            )
     
     except APIError:
         raise
     except Exception as e:
         logger.error(f"Text-to-speech error: {str(e)}")
         raise APIError(f'Speech synthesis failed: {str(e)}', 500)
+    
+    return audio_response(audio_bytes, etag, audio_format)
+
+def negotiate_audio_format(requested):
+    """
+    Pick the TTS output format from an explicit request or the Accept header
+    
+    Args:
+        requested: Format name from the request, or None
+    
+    Returns:
+        str: Format name from TTSService.FORMATS
+    """
+    available = get_tts_service().available_formats()
+    if requested:
+        if requested not in available:
+            raise APIError(f"Unsupported format '{requested}', available: {', '.join(available)}", 400)
+        return requested
+    
+    default = TTS_DEFAULT_FORMAT if TTS_DEFAULT_FORMAT in available else 'mp3'
+    # First available format per mimetype, with the configured default preferred
+    by_mimetype = {}
+    for name in [default] + available:
+        by_mimetype.setdefault(TTSService.FORMATS[name][0], name)
+    
+    mimetype = request.accept_mimetypes.best_match(
+        list(by_mimetype), default=TTSService.FORMATS[default][0]
+    )
+    return by_mimetype[mimetype]
+
+def audio_response(audio_bytes, etag, audio_format):
+    """
+    Build an audio response with ETag validation and single byte-range support
+    
+    Args:
+        audio_bytes: Encoded audio
+        etag: ETag of the cached audio
+        audio_format: Format name from TTSService.FORMATS
+    
+    Returns:
+        Flask response (200, 206, 304, 412 or 416)
+    """
+    mimetype, extension, _ = TTSService.FORMATS[audio_format]
+    length = len(audio_bytes)
+    
+    response = Response(mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Vary'] = 'Accept'
+    response.headers['Content-Disposition'] = f'attachment; filename=speech.{extension}'
+    
+    # RFC 9110: If-None-Match uses weak comparison; a match is 304 for
+    # GET/HEAD and 412 otherwise
+    if request.if_none_match.contains_weak(etag):
+        response.status_code = 304 if request.method in ('GET', 'HEAD') else 412
+        return response
+    
+    # Honour a single range; multipart ranges and stale If-Range get the full body
+    byte_range = request.range
+    if_range = request.headers.get('If-Range')
+    if byte_range and len(byte_range.ranges) == 1 and (not if_range or request.if_range.etag == etag):
+        content_range = byte_range.make_content_range(length)
+        if content_range is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f'bytes */{length}'
+            return response
+        response.status_code = 206
+        response.headers['Content-Range'] = content_range.to_header()
+        response.set_data(audio_bytes[content_range.start:content_range.stop])
+        return response
+    
+    response.set_data(audio_bytes)
+    return response
 
 # Voice Command endpoint
 @app.route('/api/voice-command', methods=['POST'])
@@ -142,7 +247,7 @@ def text_to_speech():
 def voice_command():
     """
     Process voice command and extract intent
-    Request: { "text": "read my emails", "language": "en-US" }
+    Request: { "text": "read my emails", "language": "en-US", "contacts": { "Alice": "alice@example.com" } }
     Response: { "intent": "read_inbox", "confidence": 0.98, "entities": {} }
     """
     try:
@@ -152,8 +257,12 @@ def voice_command():
             raise APIError('Missing text data', 400)
         
         text = data['text']
+        contacts = get_contact_index(data)
         
-        result = get_intent_classifier().classify(text)
+        key = request_coalescer.make_key('voice-command', [text, data.get('contacts')])
+        result = request_coalescer.run(
+            key, lambda: get_intent_classifier().classify(text, contacts)
+        )
         
         return jsonify({
             'intent': result['intent'],
@@ -167,6 +276,50 @@ def voice_command():
         logger.error(f"Intent classification error: {str(e)}")
         raise APIError(f'Command processing failed: {str(e)}', 500)
 
+# Batch Voice Command endpoint
+@app.route('/api/voice-command/batch', methods=['POST'])
+@rate_limiter
+def voice_command_batch():
+    """
+    Process several voice commands in one request
+    Request: { "texts": ["read my emails", "open the third email"], "contacts": {} }
+    Response: { "results": [{ "intent": "read_inbox", "confidence": 0.95, "entities": {} }, ...] }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('texts'), list):
+            raise APIError('Missing texts list', 400)
+        
+        texts = data['texts']
+        if len(texts) > VOICE_COMMAND_BATCH_MAX:
+            raise APIError(f'Too many texts (maximum {VOICE_COMMAND_BATCH_MAX} per batch)', 400)
+        if not all(isinstance(text, str) for text in texts):
+            raise APIError('texts must be a list of strings', 400)
+        contacts = get_contact_index(data)
+        
+        key = request_coalescer.make_key('voice-command-batch', [texts, data.get('contacts')])
+        results = request_coalescer.run(
+            key, lambda: get_intent_classifier().classify_batch(texts, contacts)
+        )
+        
+        return jsonify({'results': results})
+    
+    except APIError:
+        raise
+    except Exception as e:
+        logger.error(f"Batch intent classification error: {str(e)}")
+        raise APIError(f'Command processing failed: {str(e)}', 500)
+
+def get_contact_index(data):
+    """Build a ContactIndex from the optional address book in a request body"""
+    contacts = data.get('contacts')
+    if not contacts:
+        return None
+    if not isinstance(contacts, dict):
+        raise APIError('contacts must map names to email addresses', 400)
+    return ContactIndex(contacts)
+
 # Spam Detection endpoint
 @app.route('/api/spam-detection', methods=['POST'])
 @rate_limiter
@@ -185,7 +338,10 @@ def spam_detection():
         subject = data['subject']
         body = data['body']
         
-        result = get_spam_detector().detect(subject, body)
+        key = request_coalescer.make_key('spam-detection', [subject, body])
+        result = request_coalescer.run(
+            key, lambda: get_spam_detector().detect(subject, body)
+        )
         
         return jsonify({
             'is_spam': result['is_spam'],
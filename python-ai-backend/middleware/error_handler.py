@@ -10,7 +10,7 @@ class APIError(Exception):
     """Custom API Error class"""
     
     def __init__(self, message, status_code=400):
-        super().__init__()
+        super().__init__(message)
         self.message = message
         self.status_code = status_code
     
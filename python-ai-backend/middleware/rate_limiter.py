@@ -15,6 +15,36 @@ request_counts = {}
 RATE_LIMIT_WINDOW = 60  # seconds
 RATE_LIMIT_MAX = int(os.getenv('RATE_LIMIT_PER_MINUTE', 60))
 
+def check_rate_limit():
+    """
+    Count the current request against its IP address
+    Raises APIError (429) when the limit is exceeded
+    """
+    # Get client IP
+    client_ip = request.remote_addr
+    current_time = time.time()
+    
+    # Clean up old entries
+    expired_ips = [
+        ip for ip, (count, timestamp) in request_counts.items()
+        if current_time - timestamp > RATE_LIMIT_WINDOW
+    ]
+    for ip in expired_ips:
+        del request_counts[ip]
+    
+    # Check rate limit
+    if client_ip in request_counts:
+        count, timestamp = request_counts[client_ip]
+        if current_time - timestamp < RATE_LIMIT_WINDOW:
+            if count >= RATE_LIMIT_MAX:
+                logger.warning(f"Rate limit exceeded for {client_ip}")
+                raise APIError('Rate limit exceeded. Please try again later.', 429)
+            request_counts[client_ip] = (count + 1, timestamp)
+        else:
+            request_counts[client_ip] = (1, current_time)
+    else:
+        request_counts[client_ip] = (1, current_time)
+
 def rate_limiter(f):
     """
     Rate limiting decorator
@@ -22,31 +52,7 @@ def rate_limiter(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get client IP
-        client_ip = request.remote_addr
-        current_time = time.time()
-        
-        # Clean up old entries
-        expired_ips = [
-            ip for ip, (count, timestamp) in request_counts.items()
-            if current_time - timestamp > RATE_LIMIT_WINDOW
-        ]
-        for ip in expired_ips:
-            del request_counts[ip]
-        
-        # Check rate limit
-        if client_ip in request_counts:
-            count, timestamp = request_counts[client_ip]
-            if current_time - timestamp < RATE_LIMIT_WINDOW:
-                if count >= RATE_LIMIT_MAX:
-                    logger.warning(f"Rate limit exceeded for {client_ip}")
-                    raise APIError('Rate limit exceeded. Please try again later.', 429)
-                request_counts[client_ip] = (count + 1, timestamp)
-            else:
-                request_counts[client_ip] = (1, current_time)
-        else:
-            request_counts[client_ip] = (1, current_time)
-        
+        check_rate_limit()
         return f(*args, **kwargs)
     
     return decorated_function
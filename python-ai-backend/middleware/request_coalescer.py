@@ -0,0 +1,143 @@
+"""
+Request coalescing (single-flight) for identical in-flight requests
+"""
+import os
+import copy
+import json
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Bound on distinct in-flight keys; beyond this requests run uncoalesced
+COALESCE_MAX_INFLIGHT = int(os.getenv('COALESCE_MAX_INFLIGHT', 256))
+# Seconds a duplicate waits for the first request before running its own
+COALESCE_WAIT_TIMEOUT = float(os.getenv('COALESCE_WAIT_TIMEOUT', 120))
+
+
+class _Call:
+    """A single in-flight computation shared by duplicate requests"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCoalescer:
+    """
+    Single-flight layer: concurrent requests with the same key share one
+    execution instead of each running the model again
+    """
+
+    def __init__(self, max_inflight=COALESCE_MAX_INFLIGHT, wait_timeout=COALESCE_WAIT_TIMEOUT):
+        self.max_inflight = max_inflight
+        self.wait_timeout = wait_timeout
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.counters = {
+            'executed': 0,
+            'coalesced': 0,
+            'bypassed': 0,
+            'wait_timeouts': 0,
+        }
+
+    @staticmethod
+    def make_key(endpoint, payload):
+        """
+        Build a content hash for a request payload
+
+        Args:
+            endpoint: Name of the endpoint, so equal payloads on different routes never collide
+            payload: JSON-serializable request fields that determine the result
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(f"{endpoint}\n{body}".encode('utf-8')).hexdigest()
+
+    def run(self, key, func):
+        """
+        Run func, or wait for an identical in-flight call to finish
+
+        Args:
+            key: Request key from make_key
+            func: Zero-argument callable producing the result
+
+        Returns:
+            Result of func, possibly shared with concurrent duplicates
+        """
+        with self.lock:
+            call = self.inflight.get(key)
+            if call is not None:
+                self.counters['coalesced'] += 1
+                leader = False
+            elif len(self.inflight) >= self.max_inflight:
+                self.counters['bypassed'] += 1
+                call = None
+            else:
+                call = _Call()
+                self.inflight[key] = call
+                self.counters['executed'] += 1
+                leader = True
+
+        if call is None:
+            return func()
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                with self.lock:
+                    self.counters['wait_timeouts'] += 1
+                logger.warning("Coalesced request timed out waiting, running it directly")
+                return func()
+            if call.error is not None:
+                # Each waiter raises its own copy, keeping the leader's exception
+                # type (and so its HTTP status) without sharing traceback state
+                raise self._copy_error(call.error) from call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            call.done.set()
+
+    @staticmethod
+    def _copy_error(error):
+        """
+        Copy an exception for a waiter to raise
+
+        Args:
+            error: Exception raised by the leader
+
+        Returns:
+            Exception: Copy of the same type, or RuntimeError if it cannot be copied
+        """
+        try:
+            return copy.copy(error)
+        except Exception:
+            return RuntimeError(str(error))
+
+    def stats(self):
+        """
+        Get coalescing metrics
+
+        Returns:
+            dict: Counters plus current in-flight count and coalescing ratio
+        """
+        with self.lock:
+            stats = dict(self.counters)
+            stats['inflight'] = len(self.inflight)
+        total = stats['executed'] + stats['coalesced'] + stats['bypassed']
+        stats['coalesced_ratio'] = round(stats['coalesced'] / total, 4) if total else 0.0
+        return stats
+
+
+request_coalescer = RequestCoalescer()
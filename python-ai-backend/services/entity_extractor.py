@@ -0,0 +1,276 @@
+"""
+Entity Extraction Engine for voice commands
+"""
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Relative date phrases understood in commands ("emails from yesterday")
+DATE_WORDS = [
+    'today', 'yesterday', 'tomorrow',
+    'this morning', 'this afternoon', 'tonight',
+    'this week', 'last week', 'this month', 'last month',
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+]
+
+# Ordinal words used to pick an email from a list ("open the third email")
+ORDINAL_WORDS = {
+    'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5,
+    'sixth': 6, 'seventh': 7, 'eighth': 8, 'ninth': 9, 'tenth': 10,
+    'last': -1,
+}
+
+EMAIL_PATTERN = r'[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}'
+# Words that introduce a recipient or sender ("reply to will")
+ADDRESSING_WORDS = ['to', 'from', 'for', 'cc']
+
+# Command words stripped from search commands to leave the query
+SEARCH_COMMAND_RE = re.compile(r'\b(search|find|look for)\b', re.IGNORECASE)
+WORD_RE = re.compile(r'\w+')
+
+
+def _normalize(phrase):
+    """Lowercase a phrase and reduce it to single-space separated words"""
+    return ' '.join(WORD_RE.findall(phrase.lower()))
+
+
+def _phrase_pattern(phrase):
+    """
+    Pattern for a normalized phrase. Words may be separated by any run of
+    non-word characters, so "O'Brien" matches the normalized name "o brien".
+    """
+    return re.escape(phrase).replace(r'\ ', r'\W+')
+
+
+def _canonical(spoken, table, fallback=False):
+    """
+    Find the table key for a matched phrase
+
+    Args:
+        spoken: Matched text
+        table: Keys (normalized phrases) to look the text up in
+        fallback: Text came from the case-insensitive fallback scanner, whose
+                  matches can lowercase to something other than the key
+                  ("ALİCE" lowercases to "ali\u0307ce"); retry a failed lookup
+                  with the same case-insensitive matching
+
+    Returns:
+        str: Key in table, or None
+    """
+    key = _normalize(spoken)
+    if key in table or not fallback:
+        return key if key in table else None
+    for candidate in table:
+        if re.fullmatch(_phrase_pattern(candidate), spoken, re.IGNORECASE):
+            return candidate
+    return None
+
+
+def _words_alternative(name, words, pattern_prefix=''):
+    """
+    Build a scanner alternative matching literal phrases, longest first
+
+    Returns:
+        tuple: (entity type, pattern, possible first characters)
+    """
+    pattern = pattern_prefix + '|'.join(
+        _phrase_pattern(word) for word in sorted(words, key=len, reverse=True)
+    )
+    return name, pattern, {word[0] for word in words}
+
+
+def _compile_scanners(alternatives):
+    """
+    Build the combined scanning regex with one named group per entity type
+
+    Word entities sit behind a lookahead on their possible first characters,
+    so most words in a command are rejected without walking the alternation.
+
+    Args:
+        alternatives: List of (entity type, lowercase pattern, first characters)
+                      in priority order
+
+    Returns:
+        tuple: (scanner for lowercased text, case-insensitive fallback scanner)
+    """
+    first_chars = set()
+    for _, _, chars in alternatives:
+        first_chars.update(chars)
+    # \d keeps numbers in any script ("١٢") reachable
+    lookahead = r'\d' + ''.join(re.escape(char) for char in sorted(first_chars))
+    groups = '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in alternatives)
+    pattern = rf'\b(?:(?P<email>{EMAIL_PATTERN})|(?=[{lookahead}])(?:{groups}))\b'
+    return re.compile(pattern), re.compile(pattern, re.IGNORECASE)
+
+
+# Dates come before ordinals so "last week" wins over the ordinal "last",
+# and ordinals ("3rd") come before plain numbers.
+BASE_ALTERNATIVES = [
+    _words_alternative('date', DATE_WORDS),
+    _words_alternative('ordinal', ORDINAL_WORDS, pattern_prefix=r'\d+(?:st|nd|rd|th)|'),
+    ('number', r'\d+', set()),
+]
+
+DEFAULT_SCANNERS = _compile_scanners(BASE_ALTERNATIVES)
+
+
+class ContactIndex:
+    """Address-book index for resolving spoken contact names to email addresses"""
+
+    def __init__(self, contacts):
+        """
+        Build the contact index and compile its scanner once
+
+        Args:
+            contacts: Mapping of display name to email address
+        """
+        self.names = {}
+        self.aliases = {}
+        first_names = {}
+        for name, address in (contacts or {}).items():
+            key = _normalize(name)
+            if not key or not isinstance(address, str) or not address:
+                continue
+            self.names[key] = {'name': name.strip(), 'email': address}
+            first = key.split(' ')[0]
+            if first != key:
+                first_names.setdefault(first, []).append(self.names[key])
+
+        # Unambiguous first names become aliases. Single words are often
+        # ordinary words too ("will", "may", "mark"), so single-word names and
+        # aliases only match right after an addressing word and never supply
+        # the email address on their own. Multi-word names match anywhere.
+        for first, matches in first_names.items():
+            if len(matches) == 1 and first not in self.names:
+                self.aliases[first] = matches[0]
+
+        if self.names:
+            _, addressed, _ = _words_alternative('addressed', list(self.names) + list(self.aliases))
+            prefix = '|'.join(ADDRESSING_WORDS)
+            alternatives = [
+                ('addressed', rf'(?:{prefix})\W+(?:{addressed})', {word[0] for word in ADDRESSING_WORDS}),
+            ]
+            full_names = [key for key in self.names if ' ' in key]
+            if full_names:
+                alternatives.append(_words_alternative('contact', full_names))
+            # Contacts come before dates so a contact called "Monday" still resolves
+            self.scanners = _compile_scanners(alternatives + BASE_ALTERNATIVES)
+        else:
+            self.scanners = DEFAULT_SCANNERS
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, name, addressed=False, fallback=False):
+        """
+        Look up a contact by spoken name
+
+        Args:
+            name: Name as it appears in the command text
+            addressed: Name followed an addressing word, so single-word
+                       names and first-name aliases are accepted
+            fallback: Name came from the case-insensitive fallback scanner
+
+        Returns:
+            tuple: ({'name': display_name, 'email': address} or None,
+                    matched by a single word)
+        """
+        key = _canonical(name, self.names, fallback)
+        if key and (addressed or ' ' in key):
+            return self.names[key], ' ' not in key
+        if addressed:
+            key = _canonical(name, self.aliases, fallback)
+            if key:
+                return self.aliases[key], True
+        return None, False
+
+
+class EntityExtractor:
+    """Extracts entities from command text in a single scanning pass"""
+
+    def extract(self, text, intent, contacts=None):
+        """
+        Extract entities from text based on intent
+
+        Args:
+            text: User command text
+            intent: Classified intent
+            contacts: Optional ContactIndex for resolving contact names
+
+        Returns:
+            dict: Extracted entities
+        """
+        entities = {}
+        single_word_contact = False
+        scanner, fallback = contacts.scanners if contacts else DEFAULT_SCANNERS
+
+        # Scan lowercased text with the plain scanner; offsets only line up
+        # with the original when lowercasing did not change the length
+        lowered = text.lower()
+        use_fallback = len(lowered) != len(text)
+        if use_fallback:
+            matches = fallback.finditer(text)
+        else:
+            matches = scanner.finditer(lowered)
+
+        # Keep the first match of each entity type
+        for match in matches:
+            kind = match.lastgroup
+            if kind in entities:
+                continue
+
+            if kind == 'email':
+                entities['email'] = text[match.start():match.end()]
+            elif kind == 'number':
+                entities['number'] = int(match.group())
+            elif kind == 'ordinal':
+                value = match.group()
+                if value[:-2].isdecimal():
+                    entities['ordinal'] = int(value[:-2])
+                else:
+                    word = _canonical(value, ORDINAL_WORDS, use_fallback)
+                    if word:
+                        entities['ordinal'] = ORDINAL_WORDS[word]
+            elif kind == 'date':
+                word = _canonical(match.group(), DATE_WORDS, use_fallback)
+                if word:
+                    entities['date'] = word
+            elif kind in ('contact', 'addressed'):
+                spoken = match.group()
+                if kind == 'addressed':
+                    # Drop the addressing word before looking the name up
+                    spoken = re.split(r'\W+', spoken, maxsplit=1)[1]
+                contact, single_word = contacts.resolve(
+                    spoken, addressed=kind == 'addressed', fallback=use_fallback
+                )
+                if contact:
+                    entities['contact'], single_word_contact = contact, single_word
+
+        # A contact resolved by full name supplies the address when none was spoken
+        if 'contact' in entities and 'email' not in entities and not single_word_contact:
+            entities['email'] = entities['contact']['email']
+
+        # Extract search queries for search intent
+        if intent == 'search':
+            # Remove command words and extract remaining text as query
+            query = SEARCH_COMMAND_RE.sub('', text).strip()
+            if query:
+                entities['query'] = query
+
+        return entities
+
+    def extract_batch(self, texts, intents, contacts=None):
+        """
+        Extract entities for many commands at once
+
+        Args:
+            texts: List of command texts
+            intents: List of classified intents, one per text
+            contacts: Optional ContactIndex shared by the whole batch
+
+        Returns:
+            list: Extracted entities per text
+        """
+        extract = self.extract
+        return [extract(text, intent, contacts) for text, intent in zip(texts, intents)]
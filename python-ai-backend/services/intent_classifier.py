@@ -3,8 +3,8 @@ Intent Classification Service using Hugging Face Transformers
 """
 import os
 import logging
-import re
 from transformers import pipeline
+from services.entity_extractor import EntityExtractor
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +30,7 @@ class IntentClassifier:
     def __init__(self):
         """Initialize intent classifier"""
         logger.info("Initializing Intent Classifier")
+        self.entity_extractor = EntityExtractor()
         
         try:
             # Use zero-shot classification for flexible intent detection
@@ -42,28 +43,26 @@ class IntentClassifier:
             logger.warning(f"Failed to load transformer model: {str(e)}")
             self.classifier = None
     
-    def classify(self, text):
+    def classify(self, text, contacts=None):
         """
         Classify user intent from text
         
         Args:
             text: User command text
+            contacts: Optional ContactIndex for resolving contact names
         
         Returns:
             dict: {'intent': intent_name, 'confidence': score, 'entities': {}}
         """
         try:
-            text_lower = text.lower().strip()
-            
             # First try rule-based matching (faster)
-            for intent, patterns in self.INTENTS.items():
-                for pattern in patterns:
-                    if pattern in text_lower:
-                        return {
-                            'intent': intent,
-                            'confidence': 0.95,
-                            'entities': self._extract_entities(text, intent)
-                        }
+            intent = self._match_rules(text)
+            if intent:
+                return {
+                    'intent': intent,
+                    'confidence': 0.95,
+                    'entities': self._extract_entities(text, intent, contacts)
+                }
             
             # Fall back to ML-based classification if available
             if self.classifier:
@@ -73,7 +72,7 @@ class IntentClassifier:
                 return {
                     'intent': result['labels'][0],
                     'confidence': result['scores'][0],
-                    'entities': self._extract_entities(text, result['labels'][0])
+                    'entities': self._extract_entities(text, result['labels'][0], contacts)
                 }
             
             # Default to unknown intent
@@ -91,35 +90,87 @@ class IntentClassifier:
                 'entities': {}
             }
     
-    def _extract_entities(self, text, intent):
+    def classify_batch(self, texts, contacts=None):
+        """
+        Classify many commands at once
+        
+        Rule-based matches are resolved first; the remaining texts go to the
+        transformer model in a single call, and entities for the whole batch
+        are extracted with one shared extractor.
+        
+        Args:
+            texts: List of user command texts
+            contacts: Optional ContactIndex shared by the whole batch
+        
+        Returns:
+            list: Classification result per text, in input order
+        """
+        results = [None] * len(texts)
+        unmatched = []
+        
+        for i, text in enumerate(texts):
+            intent = self._match_rules(text)
+            if intent:
+                results[i] = {'intent': intent, 'confidence': 0.95}
+            else:
+                unmatched.append(i)
+        
+        if unmatched and self.classifier:
+            try:
+                candidate_labels = list(self.INTENTS.keys())
+                predictions = self.classifier([texts[i] for i in unmatched], candidate_labels)
+                if isinstance(predictions, dict):
+                    predictions = [predictions]
+                for i, result in zip(unmatched, predictions):
+                    results[i] = {
+                        'intent': result['labels'][0],
+                        'confidence': result['scores'][0]
+                    }
+            except Exception as e:
+                logger.error(f"Batch intent classification error: {str(e)}")
+        
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = {'intent': 'unknown', 'confidence': 0.0, 'entities': {}}
+        
+        known = [i for i, result in enumerate(results) if result['intent'] != 'unknown']
+        entities = self.entity_extractor.extract_batch(
+            [texts[i] for i in known],
+            [results[i]['intent'] for i in known],
+            contacts
+        )
+        for i, extracted in zip(known, entities):
+            results[i]['entities'] = extracted
+        
+        return results
+    
+    def _match_rules(self, text):
+        """
+        Match text against the rule-based intent patterns
+        
+        Args:
+            text: User command text
+        
+        Returns:
+            str: Matched intent name, or None
+        """
+        text_lower = text.lower().strip()
+        for intent, patterns in self.INTENTS.items():
+            for pattern in patterns:
+                if pattern in text_lower:
+                    return intent
+        return None
+    
+    def _extract_entities(self, text, intent, contacts=None):
         """
         Extract entities from text based on intent
         
         Args:
             text: User command text
             intent: Classified intent
+            contacts: Optional ContactIndex for resolving contact names
         
         Returns:
             dict: Extracted entities
         """
-        entities = {}
-        
-        # Extract email addresses
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        if emails:
-            entities['email'] = emails[0]
-        
-        # Extract search queries for search intent
-        if intent == 'search':
-            # Remove command words and extract remaining text as query
-            query = re.sub(r'\b(search|find|look for)\b', '', text, flags=re.IGNORECASE).strip()
-            if query:
-                entities['query'] = query
-        
-        # Extract numbers (for email selection)
-        numbers = re.findall(r'\b\d+\b', text)
-        if numbers:
-            entities['number'] = int(numbers[0])
-        
-        return entities
+        return self.entity_extractor.extract(text, intent, contacts)
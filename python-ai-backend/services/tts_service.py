@@ -2,63 +2,190 @@
 Text-to-Speech Service using gTTS
 """
 import os
+import shutil
+import hashlib
 import logging
+import subprocess
 import tempfile
+import threading
+from collections import OrderedDict
 from gtts import gTTS
 from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
+TTS_OPUS_BITRATE = os.getenv('TTS_OPUS_BITRATE', '24k')
+TTS_LOW_MP3_BITRATE = os.getenv('TTS_LOW_MP3_BITRATE', '32k')
+TTS_ENCODE_TIMEOUT = int(os.getenv('TTS_ENCODE_TIMEOUT', 30))
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
 class TTSService:
     """Service for converting text to speech"""
     
+    # Output formats: name -> (mimetype, file extension, ffmpeg output args).
+    # 'mp3' is gTTS output as-is; the others are re-encoded through ffmpeg.
+    FORMATS = {
+        'mp3': ('audio/mpeg', 'mp3', None),
+        'mp3-low': ('audio/mpeg', 'mp3', [
+            '-codec:a', 'libmp3lame', '-b:a', TTS_LOW_MP3_BITRATE, '-ac', '1', '-f', 'mp3'
+        ]),
+        'opus': ('audio/ogg', 'ogg', [
+            '-codec:a', 'libopus', '-b:a', TTS_OPUS_BITRATE, '-ac', '1',
+            '-application', 'voip', '-f', 'ogg'
+        ]),
+    }
+    
     def __init__(self):
         """Initialize TTS service"""
-        self.cache = {}  # Simple in-memory cache for common phrases
+        # LRU cache bounded by total audio size:
+        # (language, text, format) -> (audio bytes, etag)
+        self.cache = OrderedDict()
+        self.cache_bytes = 0
+        self.cache_max_bytes = TTS_CACHE_MAX_BYTES
+        self.cache_lock = threading.Lock()
+        self.ffmpeg = shutil.which(os.getenv('FFMPEG_PATH', 'ffmpeg'))
+        if not self.ffmpeg:
+            logger.warning("ffmpeg not found, TTS output limited to MP3 from gTTS")
         logger.info("TTS Service initialized with caching")
     
-    def synthesize(self, text, language='en'):
+    def available_formats(self):
+        """
+        List output formats this instance can produce
+        
+        Returns:
+            list: Format names, 'mp3' first
+        """
+        return [
+            name for name, (_, _, ffmpeg_args) in self.FORMATS.items()
+            if ffmpeg_args is None or self.ffmpeg
+        ]
+    
+    def synthesize(self, text, language='en', audio_format='mp3'):
         """
         Convert text to speech audio (optimized with caching)
         
         Args:
             text: Text to convert to speech
             language: Language code (default: 'en')
+            audio_format: Output format from FORMATS (default: 'mp3')
         
         Returns:
-            BytesIO: Audio data as MP3
+            BytesIO: Audio data in the requested format
+        """
+        audio_bytes, _ = self.get_audio(text, language, audio_format)
+        return BytesIO(audio_bytes)
+    
+    def get_audio(self, text, language='en', audio_format='mp3'):
+        """
+        Get encoded audio and its ETag, generating it on a cache miss
+        
+        Args:
+            text: Text to convert to speech
+            language: Language code (default: 'en')
+            audio_format: Output format from FORMATS (default: 'mp3')
+        
+        Returns:
+            tuple: (audio bytes, etag)
         """
         try:
-            # Check cache first (for common phrases)
-            cache_key = f"{language}:{text[:100]}"
-            if cache_key in self.cache:
+            if audio_format not in self.available_formats():
+                raise ValueError(f"Unsupported audio format: {audio_format}")
+            
+            cached = self.lookup(text, language, audio_format)
+            if cached:
                 logger.info("Returning cached TTS audio")
-                cached_audio = self.cache[cache_key]
-                audio_data = BytesIO(cached_audio)
-                audio_data.seek(0)
-                return audio_data
+                return cached
             
-            # Generate speech directly to BytesIO (faster than file I/O)
-            logger.info(f"Generating TTS for: {text[:50]}...")
-            tts = gTTS(text=text, lang=language, slow=False)
-            audio_data = BytesIO()
-            tts.write_to_fp(audio_data)
-            audio_data.seek(0)
+            # Encoded variants are made from the cached gTTS MP3 when present
+            mp3_entry = self.lookup(text, language, 'mp3')
+            if not mp3_entry:
+                # Generate speech directly to BytesIO (faster than file I/O)
+                logger.info(f"Generating TTS for: {text[:50]}...")
+                tts = gTTS(text=text, lang=language, slow=False)
+                audio_data = BytesIO()
+                tts.write_to_fp(audio_data)
+                mp3_entry = self._store((language, text, 'mp3'), audio_data.getvalue())
             
-            # Cache small responses (< 200 chars) for faster subsequent access
-            if len(text) < 200:
-                audio_bytes = audio_data.read()
-                self.cache[cache_key] = audio_bytes
-                audio_data = BytesIO(audio_bytes)
-                audio_data.seek(0)
-                logger.info(f"Cached TTS audio (cache size: {len(self.cache)})")
+            if audio_format == 'mp3':
+                return mp3_entry
             
-            return audio_data
+            encoded = self.encode(mp3_entry[0], audio_format)
+            return self._store((language, text, audio_format), encoded)
         
         except Exception as e:
             logger.error(f"TTS synthesis error: {str(e)}", exc_info=True)
             raise Exception(f"Failed to synthesize speech: {str(e)}")
     
+    def lookup(self, text, language, audio_format):
+        """
+        Get cached audio without generating it
+        
+        Returns:
+            tuple: (audio bytes, etag) or None on a cache miss
+        """
+        key = (language, text, audio_format)
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry:
+                self.cache.move_to_end(key)
+            return entry
+    
+    def _store(self, key, audio_bytes):
+        """
+        Cache audio under key, evicting least recently used entries to stay in budget
+        
+        Returns:
+            tuple: (audio bytes, etag)
+        """
+        entry = (audio_bytes, self._etag(audio_bytes))
+        if len(audio_bytes) > self.cache_max_bytes:
+            return entry
+        
+        with self.cache_lock:
+            previous = self.cache.pop(key, None)
+            if previous:
+                self.cache_bytes -= len(previous[0])
+            self.cache[key] = entry
+            self.cache_bytes += len(audio_bytes)
+            while self.cache_bytes > self.cache_max_bytes:
+                _, (evicted, _) = self.cache.popitem(last=False)
+                self.cache_bytes -= len(evicted)
+            logger.info(f"Cached TTS audio (entries: {len(self.cache)}, bytes: {self.cache_bytes})")
+        return entry
+    
+    @staticmethod
+    def _etag(audio_bytes):
+        """Strong ETag for audio content"""
+        return hashlib.sha256(audio_bytes).hexdigest()
+    
+    def encode(self, mp3_bytes, audio_format):
+        """
+        Re-encode gTTS MP3 output through an ffmpeg pipe
+        
+        Args:
+            mp3_bytes: MP3 audio produced by gTTS
+            audio_format: Output format from FORMATS
+        
+        Returns:
+            bytes: Encoded audio
+        """
+        ffmpeg_args = self.FORMATS[audio_format][2]
+        if ffmpeg_args is None:
+            return mp3_bytes
+        
+        result = subprocess.run(
+            [self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0']
+            + ffmpeg_args + ['pipe:1'],
+            input=mp3_bytes,
+            capture_output=True,
+            timeout=TTS_ENCODE_TIMEOUT
+        )
+        if result.returncode != 0 or not result.stdout:
+            raise RuntimeError(
+                f"ffmpeg {audio_format} encoding failed: {result.stderr.decode(errors='replace').strip()}"
+            )
+        return result.stdout
+    
     def synthesize_to_file(self, text, output_path, language='en'):
         """
         Convert text to speech and save to file